@@ -0,0 +1,18 @@
+"""
+Precompute the LALR parser tables used by parser.py.
+Run `python -m build_parser` after changing the grammar; parser.py then loads
+the saved tables at startup instead of analysing the grammar again.
+"""
+
+from pathlib import Path
+from lark import Lark
+from grammar import GRAMMAR, PARSER_CACHE, PARSER_OPTIONS
+
+def main():
+    path = Path(PARSER_CACHE)
+    path.unlink(missing_ok=True)
+    Lark(GRAMMAR, cache=PARSER_CACHE, **PARSER_OPTIONS)
+    print(f"Saved parser tables to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+MiniLang grammar and the Lark options used to build its parsers.
+Kept free of side effects so build_parser.py can compile the grammar without
+constructing the parsers in parser.py.
+"""
+
+from pathlib import Path
+
+# Grammar definition
+GRAMMAR = """
+start: statement+
+
+?statement: assignment
+         | if_statement
+         | while_loop
+         | for_loop
+         | assert_stmt
+
+assignment: NAME "=" expr ";"
+if_statement: "when" "(" expr ")" block "otherwise" block
+while_loop: "repeat" "(" expr ")" block
+for_loop: "iterate" "(" assignment expr ";" assignment ")" block
+assert_stmt: "verify" "(" expr ")" ";"
+
+block: "{" statement* "}"
+
+?expr: sum
+     | sum COMPARATOR sum -> condition
+
+?sum: term
+    | sum "+" term -> add
+    | sum "-" term -> sub
+
+?term: factor
+     | term "*" factor -> mul
+     | term "/" factor -> div
+
+?factor: NUMBER -> number
+       | NAME -> var
+       | "(" expr ")"
+
+COMPARATOR: ">" | "<" | ">=" | "<=" | "==" | "!="
+
+%import common.NUMBER
+%import common.CNAME -> NAME
+%import common.WS
+
+%ignore WS
+"""
+
+# Options shared by both parsers, so they hash to the same table cache
+PARSER_OPTIONS = dict(parser='lalr', propagate_positions=False, maybe_placeholders=False)
+
+# Analysed LALR tables are saved here on first use and loaded on later runs
+# instead of re-analysing the grammar. Lark checks the file against a hash of
+# the grammar and options and rebuilds it when stale. See build_parser.py.
+PARSER_CACHE = str(Path(__file__).with_name('parser.lark.pkl'))
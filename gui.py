@@ -110,8 +110,9 @@ class MiniLangGUI:
 
         # SSA
         try:
-            ssa = SSAConverter().convert(ast)
-            ssa_str = format_ssa_output(ssa)
+            converter = SSAConverter()
+            ssa = converter.convert(ast).view_as_tuples()
+            ssa_str = format_ssa_output(converter)
         except Exception as e:
             ssa_str = f"SSA Error:\n{e}"
 
@@ -136,9 +137,9 @@ class MiniLangGUI:
             return
         try:
             ast1 = parse_and_transform(prog1)
-            ssa1 = SSAConverter().convert(ast1)
+            ssa1 = SSAConverter().convert(ast1).view_as_tuples()
             ast2 = parse_and_transform(prog2)
-            ssa2 = SSAConverter().convert(ast2)
+            ssa2 = SSAConverter().convert(ast2).view_as_tuples()
             result = check_program_equivalence(ssa1, ssa2)
         except Exception as e:
             result = f"Equivalence Error:\n{e}"
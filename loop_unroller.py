@@ -4,6 +4,7 @@ Supports unrolling 'for' and 'while' loops up to a given bound.
 """
 
 import copy
+from opcodes import BINOPS, OP_COND, OP_SYMBOLS, OP_VAR
 
 def unroll_loops(ast, unroll_bound=3):
     """
@@ -76,13 +77,12 @@ def format_unrolled_code(ast):
 
     def format_expr(expr):
         if isinstance(expr, tuple):
-            if expr[0] == 'var':
+            if expr[0] == OP_VAR:
                 return expr[1]
-            elif expr[0] == 'cond':
+            elif expr[0] == OP_COND:
                 return f"{format_expr(expr[2])} {expr[1]} {format_expr(expr[3])}"
-            elif expr[0] in ('add', 'sub', 'mul', 'div'):
-                ops = {'add': '+', 'sub': '-', 'mul': '*', 'div': '/'}
-                return f"{format_expr(expr[1])} {ops[expr[0]]} {format_expr(expr[2])}"
+            elif expr[0] in BINOPS:
+                return f"{format_expr(expr[1])} {OP_SYMBOLS[expr[0]]} {format_expr(expr[2])}"
         return str(expr)
 
     return '\n'.join(fmt(stmt) for stmt in ast) 
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Integer opcodes used to tag expression nodes in the AST and SSA form.
+Expression tuples carry one of these as their first element, e.g.
+(OP_ADD, left, right), so stages can dispatch by indexing a table.
+SSA statement kinds follow the expression opcodes.
+"""
+
+OP_ADD = 1   # (OP_ADD, left, right)
+OP_SUB = 2   # (OP_SUB, left, right)
+OP_MUL = 3   # (OP_MUL, left, right)
+OP_DIV = 4   # (OP_DIV, left, right)
+OP_VAR = 5   # (OP_VAR, name)
+OP_COND = 6  # (OP_COND, comparator, left, right)
+
+NUM_OPS = 7  # Number of expression opcodes, including the unused 0
+
+BINOPS = frozenset((OP_ADD, OP_SUB, OP_MUL, OP_DIV))
+
+# Source-level symbol of each arithmetic opcode, indexed by opcode
+OP_SYMBOLS = (None, '+', '-', '*', '/', None, None)
+
+# Kinds of SSA statements, stored in SSAConverter.kinds
+OP_ASSIGN = 7   # lhs := rhs
+OP_IF = 8       # if rhs
+OP_WHILE = 9    # while rhs
+OP_FOR = 10     # for rhs
+OP_ASSERT = 11  # assert(rhs)
+
+# Tag used for each non-assignment statement kind in tuple form
+STMT_TAGS = {OP_IF: 'if', OP_WHILE: 'while', OP_FOR: 'for', OP_ASSERT: 'assert'}
@@ -3,7 +3,21 @@ Program parser and AST transformer implementation.
 This module handles parsing of the custom language and converts it to an AST.
 """
 
-from ssa_converter import SSAConverter, format_ssa_output
+import argparse
+import sys
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from lark import Lark, Transformer
+from lark.exceptions import UnexpectedInput
+from grammar import GRAMMAR, PARSER_CACHE, PARSER_OPTIONS
+from opcodes import (OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_VAR, OP_COND,
+                     OP_IF, OP_WHILE, OP_FOR, OP_ASSERT)
+try:
+    # Cython build of ssa_converter.py (see setup.py), when available
+    from ssa_converter_c import SSAConverter, format_ssa_output
+except ImportError:
+    from ssa_converter import SSAConverter, format_ssa_output
 from smt_generator import SMTGenerator, check_program_equivalence
 from typing import List, Tuple, Any
 
@@ -30,49 +44,7 @@ when (a > b) {
 verify(c > 0);
 """
 
-# Grammar definition
-GRAMMAR = """
-start: statement+
-
-statement: assignment
-        | if_statement
-        | while_loop
-        | for_loop
-        | assert_stmt
-
-assignment: NAME "=" expr ";"
-if_statement: "when" "(" expr ")" block "otherwise" block
-while_loop: "repeat" "(" expr ")" block
-for_loop: "iterate" "(" assignment expr ";" assignment ")" block
-assert_stmt: "verify" "(" expr ")" ";"
-
-block: "{" statement* "}"
-
-expr: term
-    | expr "+" term -> add
-    | expr "-" term -> sub
-
-term: factor
-    | term "*" factor -> mul
-    | term "/" factor -> div
-
-factor: NUMBER -> number
-      | NAME -> var
-      | "(" expr ")"
-      | condition
-
-condition: expr COMPARATOR expr
-
-COMPARATOR: ">" | "<" | ">=" | "<=" | "==" | "!="
-
-%import common.NUMBER
-%import common.CNAME -> NAME
-%import common.WS
-
-%ignore WS
-"""
-
-class ASTTransformer:
+class ASTTransformer(Transformer):
     """Transforms parse tree into AST."""
     
     def start(self, statements):
@@ -82,7 +54,7 @@ class ASTTransformer:
     def assignment(self, children):
         """Assignment statement: var = expr;"""
         var, expr = children
-        return ('assign', var, expr)
+        return ('assign', str(var), expr)
     
     def if_statement(self, children):
         """If statement: when (cond) { ... } otherwise { ... }"""
@@ -111,35 +83,43 @@ class ASTTransformer:
     def add(self, children):
         """Addition: expr + term"""
         left, right = children
-        return ('add', left, right)
+        return (OP_ADD, left, right)
     
     def sub(self, children):
         """Subtraction: expr - term"""
         left, right = children
-        return ('sub', left, right)
+        return (OP_SUB, left, right)
     
     def mul(self, children):
         """Multiplication: term * factor"""
         left, right = children
-        return ('mul', left, right)
+        return (OP_MUL, left, right)
     
     def div(self, children):
         """Division: term / factor"""
         left, right = children
-        return ('div', left, right)
+        return (OP_DIV, left, right)
     
     def number(self, children):
-        """Number literal"""
-        return ('number', int(children[0]))
+        """Number literal (plain int, as expected by SSA and SMT stages)"""
+        return int(children[0])
     
     def var(self, children):
         """Variable reference"""
-        return ('var', str(children[0]))
+        return (OP_VAR, str(children[0]))
     
     def condition(self, children):
         """Condition: expr comparator expr"""
         left, op, right = children
-        return ('cond', op, left, right)
+        # Plain str rather than a lark Token, so later stages need no probing
+        return (OP_COND, str(op), left, right)
+
+# Parser used for the "Parse Tree" view; built once so the LALR tables are reused
+parser = Lark(GRAMMAR, cache=PARSER_CACHE, **PARSER_OPTIONS)
+
+# Parser with the AST transformer applied inline, so parsing and
+# transformation happen in a single pass without an intermediate tree
+_PARSER = Lark(GRAMMAR, transformer=ASTTransformer(), cache=PARSER_CACHE, **PARSER_OPTIONS)
 
 def parse_and_transform(code: str) -> List[Tuple]:
     """
@@ -151,55 +131,152 @@ def parse_and_transform(code: str) -> List[Tuple]:
     Returns:
         List of AST nodes
     """
-    # Simple tokenizer and parser implementation
-    tokens = tokenize(code)
-    return parse(tokens)
+    return _PARSER.parse(code)
+
+# ASTs of the built-in example programs, parsed once at import time
+_AST_CACHE = {
+    EXAMPLE_PROGRAM: parse_and_transform(EXAMPLE_PROGRAM),
+    EXAMPLE_PROGRAM_2: parse_and_transform(EXAMPLE_PROGRAM_2),
+}
+
+def get_ast(code: str) -> List[Tuple]:
+    """Return the AST for code, reusing the cached AST when available."""
+    ast = _AST_CACHE.get(code)
+    if ast is None:
+        ast = parse_and_transform(code)
+    return ast
+
+@lru_cache(maxsize=32)
+def get_converter(code: str) -> SSAConverter:
+    """
+    Return an SSAConverter that has converted code, converting each program
+    only once.
+    
+    Results are keyed by program text rather than id(ast), since ids can be
+    reused once an AST is garbage collected. Callers must not mutate the
+    returned converter.
+    """
+    converter = SSAConverter()
+    converter.convert(get_ast(code))
+    return converter
 
-def tokenize(code: str) -> List[str]:
-    """Simple tokenizer implementation."""
-    # This is a placeholder for the actual tokenizer implementation
-    return code.split()
+@lru_cache(maxsize=32)
+def get_ssa(code: str) -> List[Tuple]:
+    """Return the SSA form for code as tuples. Callers must not mutate it."""
+    return get_converter(code).view_as_tuples()
+
+def _summarize(converter: SSAConverter) -> Tuple[set, Counter]:
+    """
+    Collect assigned variables and per-kind statement counts.
+    
+    Args:
+        converter: SSAConverter holding a converted program
+        
+    Returns:
+        Tuple of (assigned variable names, Counter of statement kinds)
+    """
+    vars_ = set(converter.lhs)
+    vars_.discard(None)
+    return vars_, Counter(converter.kinds)
 
-def parse(tokens: List[str]) -> List[Tuple]:
-    """Simple parser implementation."""
-    # This is a placeholder for the actual parser implementation
-    return []
+STRUCTURALLY_EQUIVALENT = "Programs are equivalent"
 
-def check_program_equivalence(ssa1: List[Tuple], ssa2: List[Tuple]) -> str:
+def quick_structural_equiv(conv1: SSAConverter, conv2: SSAConverter) -> str:
     """
-    Check if two programs are equivalent based on their SSA forms.
+    Cheap structural comparison of two programs based on their SSA forms.
+    
+    Used as a pre-filter before the SMT-based check_program_equivalence:
+    programs that differ here are reported without invoking the solver.
     
     Args:
-        ssa1: SSA form of first program
-        ssa2: SSA form of second program
+        conv1: SSAConverter holding the first converted program
+        conv2: SSAConverter holding the second converted program
         
     Returns:
         String describing equivalence result
     """
-    # Compare variable assignments
-    vars1 = {v[0] for v in ssa1 if isinstance(v, tuple) and v[0] != 'if' and v[0] != 'assert'}
-    vars2 = {v[0] for v in ssa2 if isinstance(v, tuple) and v[0] != 'if' and v[0] != 'assert'}
+    vars1, counts1 = _summarize(conv1)
+    vars2, counts2 = _summarize(conv2)
     
+    # Compare variable assignments
     if vars1 != vars2:
         return "Programs are not equivalent: Different variables used"
     
     # Compare control flow
-    if_stmts1 = [v for v in ssa1 if isinstance(v, tuple) and v[0] == 'if']
-    if_stmts2 = [v for v in ssa2 if isinstance(v, tuple) and v[0] == 'if']
-    
-    if len(if_stmts1) != len(if_stmts2):
+    if any(counts1[k] != counts2[k] for k in (OP_IF, OP_WHILE, OP_FOR)):
         return "Programs are not equivalent: Different control flow"
     
     # Compare assertions
-    asserts1 = [v for v in ssa1 if isinstance(v, tuple) and v[0] == 'assert']
-    asserts2 = [v for v in ssa2 if isinstance(v, tuple) and v[0] == 'assert']
-    
-    if len(asserts1) != len(asserts2):
+    if counts1[OP_ASSERT] != counts2[OP_ASSERT]:
         return "Programs are not equivalent: Different assertions"
     
-    return "Programs are equivalent"
+    return STRUCTURALLY_EQUIVALENT
 
-def main():
+def run_steps(steps: str, program: str, program2: str, out: List[str]) -> None:
+    """
+    Run the requested analysis steps, appending output lines to out.
+    
+    Args:
+        steps: Step numbers to run, e.g. "123456" or "1,2,3"
+        program: Program code to analyse
+        program2: Second program, used by the equivalence check (step 6);
+            may be None when step 6 is not requested
+        out: List that receives the output lines
+    """
+    if '1' in steps:
+        out.append("\nInput Program:")
+        out.append("----------------------------------------")
+        out.append(program)
+    
+    if '2' in steps:
+        out.append("\nParse Tree:")
+        out.append("----------------------------------------")
+        tree = parser.parse(program)
+        out.append(tree.pretty())
+    
+    if '3' in steps:
+        out.append("\nAbstract Syntax Tree (AST):")
+        out.append("----------------------------------------")
+        out.append(str(get_ast(program)))
+    
+    if '4' in steps:
+        out.append("\nStatic Single Assignment (SSA) Form:")
+        out.append("----------------------------------------")
+        out.append(format_ssa_output(get_converter(program)))
+    
+    if '5' in steps:
+        out.append("\nProgram Verification (SMT):")
+        out.append("----------------------------------------")
+        ssa = get_ssa(program)
+        smt = SMTGenerator(ssa)
+        smt.to_smt()
+        out.append(smt.check_assertions())
+    
+    if '6' in steps:
+        out.append("\nProgram Equivalence Check:")
+        out.append("----------------------------------------")
+        # Parse and convert first program
+        ssa1 = get_ssa(program)
+        
+        # Parse and convert second program
+        out.append("\nSecond Program:")
+        out.append(program2)
+        ssa2 = get_ssa(program2)
+        
+        out.append("\nProgram 1 SSA:")
+        out.append(format_ssa_output(get_converter(program)))
+        out.append("\nProgram 2 SSA:")
+        out.append(format_ssa_output(get_converter(program2)))
+        
+        out.append("\nEquivalence Result:")
+        result = quick_structural_equiv(get_converter(program),
+                                        get_converter(program2))
+        if result == STRUCTURALLY_EQUIVALENT:
+            result = check_program_equivalence(ssa1, ssa2)
+        out.append(result)
+
+def interactive_menu():
+    """Run the interactive menu on the built-in example programs."""
     print("\nProgram Analysis Options:")
     print("----------------------------------------")
     print("1. Input Program")
@@ -216,66 +293,82 @@ def main():
             choice = input("Enter numbers (e.g., 123456 to see all): ").strip()
             if choice == '0':
                 break
-                
-            if '1' in choice:
-                print("\nInput Program:")
-                print("----------------------------------------")
-                print(EXAMPLE_PROGRAM)
-            
-            if '2' in choice:
-                print("\nParse Tree:")
-                print("----------------------------------------")
-                tokens = tokenize(EXAMPLE_PROGRAM)
-                print(tokens)
-            
-            if '3' in choice:
-                print("\nAbstract Syntax Tree (AST):")
-                print("----------------------------------------")
-                ast = parse_and_transform(EXAMPLE_PROGRAM)
-                print(ast)
-            
-            if '4' in choice:
-                print("\nStatic Single Assignment (SSA) Form:")
-                print("----------------------------------------")
-                ast = parse_and_transform(EXAMPLE_PROGRAM)
-                ssa = SSAConverter().convert(ast)
-                print(format_ssa_output(ssa))
             
-            if '5' in choice:
-                print("\nProgram Verification (SMT):")
-                print("----------------------------------------")
-                ast = parse_and_transform(EXAMPLE_PROGRAM)
-                ssa = SSAConverter().convert(ast)
-                smt = SMTGenerator(ssa)
-                smt.to_smt()
-                print(smt.check_assertions())
-            
-            if '6' in choice:
-                print("\nProgram Equivalence Check:")
-                print("----------------------------------------")
-                # Parse and convert first program
-                ast1 = parse_and_transform(EXAMPLE_PROGRAM)
-                ssa1 = SSAConverter().convert(ast1)
-                
-                # Parse and convert second program
-                print("\nSecond Program:")
-                print(EXAMPLE_PROGRAM_2)
-                ast2 = parse_and_transform(EXAMPLE_PROGRAM_2)
-                ssa2 = SSAConverter().convert(ast2)
-                
-                print("\nProgram 1 SSA:")
-                print(format_ssa_output(ssa1))
-                print("\nProgram 2 SSA:")
-                print(format_ssa_output(ssa2))
-                
-                print("\nEquivalence Result:")
-                result = check_program_equivalence(ssa1, ssa2)
-                print(result)
+            out = []
+            try:
+                run_steps(choice, EXAMPLE_PROGRAM, EXAMPLE_PROGRAM_2, out)
+            finally:
+                if out:
+                    print("\n".join(out))
                 
         except Exception as e:
             print(f"\nError: {str(e)}")
             import traceback
             traceback.print_exc()
 
+def run_batch(args: argparse.Namespace) -> int:
+    """
+    Run the requested steps on program files without any TTY interaction.
+    
+    Output is collected and written to stdout in a single call, including
+    the output of the steps that completed before a failing one.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit status: 0 on success, 1 if a program failed to parse
+    """
+    program = Path(args.program).read_text()
+    program2 = Path(args.program2).read_text() if args.program2 else None
+    out = []
+    error = None
+    try:
+        run_steps(args.steps, program, program2, out)
+    except UnexpectedInput as e:
+        error = f"Parse error: {e}"
+    finally:
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+    if error is not None:
+        sys.stdout.flush()
+        sys.stderr.write(error + "\n")
+        return 1
+    return 0
+
+def _steps_arg(value: str) -> str:
+    """
+    Validate the --steps argument.
+    
+    Args:
+        value: Step numbers, e.g. "1,2,3" or "123"
+        
+    Returns:
+        The value unchanged
+    """
+    steps = value.replace(',', '')
+    if not steps or any(step not in "123456" for step in steps):
+        raise argparse.ArgumentTypeError(f"steps must be numbers 1-6, got {value!r}")
+    return value
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Analyze MiniLang programs.")
+    arg_parser.add_argument("--interactive", action="store_true",
+                            help="run the interactive menu (default without --program)")
+    arg_parser.add_argument("--program", metavar="FILE",
+                            help="program file to analyze in batch mode")
+    arg_parser.add_argument("--program2", metavar="FILE",
+                            help="second program for the equivalence check (step 6)")
+    arg_parser.add_argument("--steps", default="1,2,3,4,5", type=_steps_arg,
+                            help="comma separated steps to run, e.g. 1,2,3,4,5,6")
+    args = arg_parser.parse_args(argv)
+    
+    if args.interactive or args.program is None:
+        interactive_menu()
+        return 0
+    if '6' in args.steps and args.program2 is None:
+        arg_parser.error("step 6 (equivalence check) requires --program2")
+    return run_batch(args)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+Optional build of the Cython-compiled SSA converter.
+
+    python setup.py build_ext --inplace
+
+compiles ssa_converter.py, using the typed attributes declared in
+ssa_converter.pxd, into the extension module ssa_converter_c, which
+parser.py imports in preference to the pure-Python source. Without the
+build, ssa_converter.py is used as-is. The extension is not rebuilt when
+ssa_converter.py changes: rerun the build, or delete ssa_converter_c.*,
+after editing it.
+"""
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+setup(
+    name="minilang-analyzer",
+    # Built under its own name so the compiled module never shadows
+    # ssa_converter.py; parser.py falls back to the source when it is absent
+    ext_modules=cythonize([Extension("ssa_converter_c", ["ssa_converter.py"])],
+                          language_level=3),
+)
@@ -1,10 +1,12 @@
 """SMT Generator for converting SSA form to Z3 constraints."""
 from z3 import *
+from opcodes import OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_VAR, OP_COND
 
 class SMTGenerator:
-    def __init__(self, ssa_code, var_prefix=""):
+    def __init__(self, ssa_code, var_prefix="", solver=None):
         self.ssa_code = ssa_code if isinstance(ssa_code, list) else [ssa_code]
-        self.solver = Solver()
+        # A caller-provided solver lets several programs share one Z3 solver
+        self.solver = solver if solver is not None else Solver()
         self.vars = {}
         self.path_condition = True
         self.constraints = []
@@ -24,9 +26,9 @@ class SMTGenerator:
         elif isinstance(expr, str):
             return self.get_var(expr)
         elif isinstance(expr, tuple):
-            if expr[0] == 'var':
+            if expr[0] == OP_VAR:
                 return self.get_var(expr[1])
-            elif expr[0] == 'cond':
+            elif expr[0] == OP_COND:
                 _, op, left, right = expr
                 left_z3 = self.expr_to_z3(left)
                 right_z3 = self.expr_to_z3(right)
@@ -42,19 +44,19 @@ class SMTGenerator:
                     return left_z3 == right_z3
                 elif op == '!=':
                     return left_z3 != right_z3
-            elif expr[0] == 'add':
+            elif expr[0] == OP_ADD:
                 left_z3 = self.expr_to_z3(expr[1])
                 right_z3 = self.expr_to_z3(expr[2])
                 return left_z3 + right_z3
-            elif expr[0] == 'sub':
+            elif expr[0] == OP_SUB:
                 left_z3 = self.expr_to_z3(expr[1])
                 right_z3 = self.expr_to_z3(expr[2])
                 return left_z3 - right_z3
-            elif expr[0] == 'mul':
+            elif expr[0] == OP_MUL:
                 left_z3 = self.expr_to_z3(expr[1])
                 right_z3 = self.expr_to_z3(expr[2])
                 return left_z3 * right_z3
-            elif expr[0] == 'div':
+            elif expr[0] == OP_DIV:
                 left_z3 = self.expr_to_z3(expr[1])
                 right_z3 = self.expr_to_z3(expr[2])
                 return left_z3 / right_z3
@@ -64,14 +66,10 @@ class SMTGenerator:
         """Convert SSA code to SMT constraints."""
         for stmt in self.ssa_code:
             if isinstance(stmt, tuple):
-                if stmt[0] == 'if':
-                    cond = stmt[1]
-                    self.solver.add(Implies(self.path_condition, self.expr_to_z3(cond)))
-                    self.constraints.append(Implies(self.path_condition, self.expr_to_z3(cond)))
-                elif stmt[0] == 'assert':
-                    cond = stmt[1]
-                    self.solver.add(Implies(self.path_condition, self.expr_to_z3(cond)))
-                    self.constraints.append(Implies(self.path_condition, self.expr_to_z3(cond)))
+                if stmt[0] == 'if' or stmt[0] == 'assert':
+                    constraint = Implies(self.path_condition, self.expr_to_z3(stmt[1]))
+                    self.solver.add(constraint)
+                    self.constraints.append(constraint)
                 else:  # Assignment
                     var, op, rhs = stmt
                     if isinstance(rhs, str) and rhs.startswith('phi'):
@@ -81,12 +79,14 @@ class SMTGenerator:
                         # For now, just used the first non-None argument
                         for arg in args:
                             if arg != 'None':
-                                self.solver.add(self.get_var(var) == self.get_var(arg))
-                                self.constraints.append(self.get_var(var) == self.get_var(arg))
+                                constraint = self.get_var(var) == self.get_var(arg)
+                                self.solver.add(constraint)
+                                self.constraints.append(constraint)
                                 break
                     else:
-                        self.solver.add(self.get_var(var) == self.expr_to_z3(rhs))
-                        self.constraints.append(self.get_var(var) == self.expr_to_z3(rhs))
+                        constraint = self.get_var(var) == self.expr_to_z3(rhs)
+                        self.solver.add(constraint)
+                        self.constraints.append(constraint)
 
     def get_final_versions(self):
         """Get the final version of each variable."""
@@ -146,9 +146,13 @@ def var_from_stmt(stmt):
 def check_program_equivalence(ssa1, ssa2):
     """Check if two programs in SSA form are equivalent by comparing their outputs under all conditions."""
     try:
-        # Create SMT solvers with distinct variable prefixes
-        smt1 = SMTGenerator(ssa1, var_prefix="p1_")
-        smt2 = SMTGenerator(ssa2, var_prefix="p2_")
+        # One solver holds both programs' constraints; individual queries
+        # are scoped with push()/pop() so the base constraints are reused
+        s = Solver()
+        
+        # Create SMT generators with distinct variable prefixes
+        smt1 = SMTGenerator(ssa1, var_prefix="p1_", solver=s)
+        smt2 = SMTGenerator(ssa2, var_prefix="p2_", solver=s)
         
         # Convert to SMT constraints
         smt1.to_smt()
@@ -158,15 +162,6 @@ def check_program_equivalence(ssa1, ssa2):
         vars1 = smt1.get_final_versions()
         vars2 = smt2.get_final_versions()
         
-        # Create a new solver for equivalence checking
-        s = Solver()
-        
-        # Add all constraints from both programs
-        for c in smt1.solver.assertions():
-            s.add(c)
-        for c in smt2.solver.assertions():
-            s.add(c)
-        
         # Check if variables can have different values
         common_vars = set(vars1.keys()) & set(vars2.keys())
         if not common_vars:
@@ -298,13 +293,31 @@ def format_condition(cond):
     if not cond:
         return "always"
     if isinstance(cond, tuple):
-        if cond[0] == 'cond':
-            op = cond[1].value if hasattr(cond[1], 'value') else cond[1]
-            left = cond[2][1] if isinstance(cond[2], tuple) and cond[2][0] == 'var' else cond[2]
+        if cond[0] == OP_COND:
+            op = cond[1]
+            left = cond[2][1] if isinstance(cond[2], tuple) and cond[2][0] == OP_VAR else cond[2]
             right = cond[3]
             return f"{left} {op} {right}"
     return str(cond)
 
+# Opcode for each string tag found in the repr form of expressions
+_TAG_OPCODES = {'add': OP_ADD, 'sub': OP_SUB, 'mul': OP_MUL, 'div': OP_DIV}
+
+def _retag_expr(expr):
+    """Convert a string-tagged expression tuple, e.g. ('var', 'x_1'), to opcode form."""
+    if not isinstance(expr, tuple) or not expr:
+        return expr
+    tag = expr[0]
+    if tag == 'number':
+        return expr[1]
+    if tag == 'var':
+        return (OP_VAR, expr[1])
+    if tag == 'cond':
+        return (OP_COND, expr[1], _retag_expr(expr[2]), _retag_expr(expr[3]))
+    if tag in _TAG_OPCODES:
+        return (_TAG_OPCODES[tag], _retag_expr(expr[1]), _retag_expr(expr[2]))
+    return expr
+
 def parse_ssa(ssa_str):
     """Parse SSA string format into structured format."""
     ssa_code = []
@@ -326,9 +339,9 @@ def parse_ssa(ssa_str):
                 # Convert condition to proper format
                 if '<' in cond:
                     left, right = cond.split('<')
-                    left = ('var', left.strip()) if not left.strip().isdigit() else int(left)
+                    left = (OP_VAR, left.strip()) if not left.strip().isdigit() else int(left)
                     right = int(right.strip())
-                    current_if = ('if', ('cond', '<', left, right), [], None)
+                    current_if = ('if', (OP_COND, '<', left, right), [], None)
             except:
                 continue
         elif line == '}':
@@ -345,40 +358,40 @@ def parse_ssa(ssa_str):
             
             try:
                 if expr.startswith('(\'var\','):
-                    expr = eval(expr)
+                    expr = _retag_expr(eval(expr))
                 elif expr.startswith('(\'cond\','):
-                    expr = eval(expr)
+                    expr = _retag_expr(eval(expr))
                 elif expr.startswith('phi('):
                     # Handle phi nodes
                     phi_args = expr[4:-1].split(',')
                     expr = ('phi', 
-                           eval(phi_args[0].strip()) if phi_args[0].strip() != 'None' else None,
-                           eval(phi_args[1].strip()) if phi_args[1].strip() != 'None' else None)
+                           _retag_expr(eval(phi_args[0].strip())) if phi_args[0].strip() != 'None' else None,
+                           _retag_expr(eval(phi_args[1].strip())) if phi_args[1].strip() != 'None' else None)
                 elif '+' in expr:
                     parts = expr.split('+')
                     left = parts[0].strip()
                     right = parts[1].strip()
-                    left = eval(left) if left.startswith('(') else (int(left) if left.isdigit() else ('var', left))
-                    right = eval(right) if right.startswith('(') else (int(right) if right.isdigit() else ('var', right))
-                    expr = ('add', left, right)
+                    left = _retag_expr(eval(left)) if left.startswith('(') else (int(left) if left.isdigit() else (OP_VAR, left))
+                    right = _retag_expr(eval(right)) if right.startswith('(') else (int(right) if right.isdigit() else (OP_VAR, right))
+                    expr = (OP_ADD, left, right)
                 elif '-' in expr:
                     parts = expr.split('-')
                     left = parts[0].strip()
                     right = parts[1].strip()
-                    left = eval(left) if left.startswith('(') else (int(left) if left.isdigit() else ('var', left))
-                    right = eval(right) if right.startswith('(') else (int(right) if right.isdigit() else ('var', right))
-                    expr = ('sub', left, right)
+                    left = _retag_expr(eval(left)) if left.startswith('(') else (int(left) if left.isdigit() else (OP_VAR, left))
+                    right = _retag_expr(eval(right)) if right.startswith('(') else (int(right) if right.isdigit() else (OP_VAR, right))
+                    expr = (OP_SUB, left, right)
                 elif '*' in expr:
                     parts = expr.split('*')
                     left = parts[0].strip()
                     right = parts[1].strip()
-                    left = eval(left) if left.startswith('(') else (int(left) if left.isdigit() else ('var', left))
-                    right = eval(right) if right.startswith('(') else (int(right) if right.isdigit() else ('var', right))
-                    expr = ('mul', left, right)
+                    left = _retag_expr(eval(left)) if left.startswith('(') else (int(left) if left.isdigit() else (OP_VAR, left))
+                    right = _retag_expr(eval(right)) if right.startswith('(') else (int(right) if right.isdigit() else (OP_VAR, right))
+                    expr = (OP_MUL, left, right)
                 elif expr.isdigit() or (expr.startswith('-') and expr[1:].isdigit()):
                     expr = int(expr)
                 else:
-                    expr = ('var', expr)
+                    expr = (OP_VAR, expr)
                 
                 stmt = ('assign', var, expr)  
                 if current_if:
@@ -394,18 +407,18 @@ def parse_ssa(ssa_str):
             try:
                 cond = line[7:-1]  # Remove assert( and )
                 if cond.startswith('(\'var\','):
-                    var = eval(cond)
-                    ssa_code.append(('assert', ('cond', '>', var, 0)))
+                    var = _retag_expr(eval(cond))
+                    ssa_code.append(('assert', (OP_COND, '>', var, 0)))
                 elif cond.startswith('(\'cond\','):
-                    cond = eval(cond)
+                    cond = _retag_expr(eval(cond))
                     ssa_code.append(('assert', cond))
                 else:
                     # Handle other assertion formats
                     if '>' in cond:
                         left, right = cond.split('>')
-                        left = ('var', left.strip()) if not left.strip().isdigit() else int(left)
+                        left = (OP_VAR, left.strip()) if not left.strip().isdigit() else int(left)
                         right = int(right.strip())
-                        ssa_code.append(('assert', ('cond', '>', left, right)))
+                        ssa_code.append(('assert', (OP_COND, '>', left, right)))
             except:
                 continue
 
@@ -0,0 +1,7 @@
+# Cython declarations for ssa_converter.py; used only when it is compiled
+# with `python setup.py build_ext --inplace`.
+
+cdef class SSAConverter:
+    cdef public dict counter, env
+    cdef public list kinds, lhs, rhs
+    cdef public list ssa_repr
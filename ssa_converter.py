@@ -3,14 +3,60 @@ Static Single Assignment (SSA) form converter implementation.
 This module converts AST into SSA form by tracking variable versions.
 """
 
+from opcodes import (BINOPS, NUM_OPS, OP_ASSERT, OP_ASSIGN, OP_COND, OP_FOR,
+                     OP_IF, OP_SYMBOLS, OP_VAR, OP_WHILE, STMT_TAGS)
+
+def _rebuild_binop(expr, left, right):
+    """Rebuild an arithmetic node, reusing it if neither operand changed."""
+    if left is expr[1] and right is expr[2]:
+        return expr
+    return (expr[0], left, right)
+
+def _rebuild_cond(expr, left, right):
+    """Rebuild a condition node, reusing it if neither operand changed."""
+    if left is expr[2] and right is expr[3]:
+        return expr
+    return (OP_COND, expr[1], left, right)
+
+# Indexed by opcode: (left child index, right child index, rebuild) for
+# compound nodes, None for leaves
+_COMPOUND = [(1, 2, _rebuild_binop) if op in BINOPS else None
+             for op in range(NUM_OPS)]
+_COMPOUND[OP_COND] = (2, 3, _rebuild_cond)
+
+# Expression depth past which transform_expr stops recursing
+_MAX_RECURSIVE_DEPTH = 200
+
+# Marks a node on _transform_deep's work stack as ready to be combined
+_POST = object()
+
+# Rendered operator for each arithmetic opcode, padded with surrounding spaces
+_OP_STRS = tuple(f" {sym} " if sym else None for sym in OP_SYMBOLS)
+
+# Statement kind -> (prefix, suffix) placed around its condition
+_STMT_FORMS = {
+    OP_IF: ('if ', ''),
+    OP_WHILE: ('while ', ''),
+    OP_FOR: ('for ', ''),
+    OP_ASSERT: ('assert(', ')'),
+}
+
+# Tuple-form statement tag -> statement kind
+_TAG_KINDS = {tag: kind for kind, tag in STMT_TAGS.items()}
+
 class SSAConverter:
     """Converts AST to SSA form."""
     
+    __slots__ = ('counter', 'env', 'kinds', 'lhs', 'rhs', 'ssa_repr')
+    
     def __init__(self):
         """Initialize SSA converter with empty state."""
         self.counter = {}  # Tracks variable versions: {'x': 3}
         self.env = {}      # Current version mapping: {'x': 'x_3'}
-        self.ssa = []      # List of SSA statements
+        # SSA statements as parallel columns: statement kind, assigned
+        # variable (None for non-assignments) and expression/condition
+        self.kinds, self.lhs, self.rhs = [], [], []
+        self.ssa_repr = None  # Rendered statements, built on first format
     
     def new_version(self, var):
         """
@@ -44,24 +90,60 @@ class SSAConverter:
         """
         Convert AST to SSA form.
         
+        The statements are stored in the kinds/lhs/rhs columns only; call
+        view_as_tuples() where the tuple form is needed.
+        
         Args:
             ast: Abstract Syntax Tree
             
         Returns:
-            List of SSA statements
-        """
-        for stmt in ast:
-            if stmt[0] == 'assign':
-                self.handle_assignment(stmt)
-            elif stmt[0] == 'if':
-                self.handle_if(stmt)
-            elif stmt[0] == 'while':
-                self.handle_while(stmt)
-            elif stmt[0] == 'for':
-                self.handle_for(stmt)
-            elif stmt[0] == 'assert':
-                self.handle_assert(stmt)
-        return self.ssa
+            This converter, holding the SSA statements
+        """
+        handlers = {
+            'assign': self.handle_assignment,
+            'if': self.handle_if,
+            'while': self.handle_while,
+            'for': self.handle_for,
+            'assert': self.handle_assert,
+        }
+        # Single worklist shared by all nesting levels; statements are
+        # pushed in reverse so they are popped in program order
+        stack = list(reversed(ast))
+        self.ssa_repr = None  # Rendered text is stale once new statements land
+        while stack:
+            stmt = stack.pop()
+            handler = handlers.get(stmt[0])
+            if handler is None:
+                continue
+            nested = handler(stmt)
+            if nested:
+                for block in reversed(nested):
+                    if block:
+                        stack.extend(reversed(block))
+        return self
+    
+    def view_as_tuples(self):
+        """
+        Return the SSA statements as a list of tuples.
+        
+        Returns:
+            List of (var, '=', expr) and (kind, cond) tuples
+        """
+        return [(lhs, '=', rhs) if kind == OP_ASSIGN else (STMT_TAGS[kind], rhs)
+                for kind, lhs, rhs in zip(self.kinds, self.lhs, self.rhs)]
+    
+    def _record(self, kind, lhs, rhs):
+        """
+        Append an SSA statement to the columns.
+        
+        Args:
+            kind: Statement kind opcode
+            lhs: Assigned variable, or None
+            rhs: Expression or condition
+        """
+        self.kinds.append(kind)
+        self.lhs.append(lhs)
+        self.rhs.append(rhs)
     
     def handle_assignment(self, stmt):
         """
@@ -73,7 +155,7 @@ class SSAConverter:
         _, var, expr = stmt
         new_var = self.new_version(var)
         new_expr = self.transform_expr(expr)
-        self.ssa.append((new_var, '=', new_expr))
+        self._record(OP_ASSIGN, new_var, new_expr)
     
     def handle_if(self, stmt):
         """
@@ -81,20 +163,14 @@ class SSAConverter:
         
         Args:
             stmt: If statement tuple
+            
+        Returns:
+            Nested blocks for the caller to convert, in order
         """
         _, cond, true_block, false_block = stmt
         new_cond = self.transform_expr(cond)
-        self.ssa.append(('if', new_cond))
-        
-        if true_block:
-            for s in true_block:
-                if s[0] == 'assign':
-                    self.handle_assignment(s)
-        
-        if false_block:
-            for s in false_block:
-                if s[0] == 'assign':
-                    self.handle_assignment(s)
+        self._record(OP_IF, None, new_cond)
+        return (true_block, false_block)
     
     def handle_while(self, stmt):
         """
@@ -102,14 +178,14 @@ class SSAConverter:
         
         Args:
             stmt: While loop tuple
+            
+        Returns:
+            Nested blocks for the caller to convert, in order
         """
         _, cond, body = stmt
         new_cond = self.transform_expr(cond)
-        self.ssa.append(('while', new_cond))
-        
-        for s in body:
-            if s[0] == 'assign':
-                self.handle_assignment(s)
+        self._record(OP_WHILE, None, new_cond)
+        return (body,)
     
     def handle_for(self, stmt):
         """
@@ -117,17 +193,15 @@ class SSAConverter:
         
         Args:
             stmt: For loop tuple
+            
+        Returns:
+            Nested blocks for the caller to convert, in order
         """
         _, init, cond, update, body = stmt
         self.handle_assignment(init)
         new_cond = self.transform_expr(cond)
-        self.ssa.append(('for', new_cond))
-        
-        for s in body:
-            if s[0] == 'assign':
-                self.handle_assignment(s)
-        
-        self.handle_assignment(update)
+        self._record(OP_FOR, None, new_cond)
+        return (body, (update,))
     
     def handle_assert(self, stmt):
         """
@@ -138,68 +212,170 @@ class SSAConverter:
         """
         _, cond = stmt
         new_cond = self.transform_expr(cond)
-        self.ssa.append(('assert', new_cond))
+        self._record(OP_ASSERT, None, new_cond)
     
-    def transform_expr(self, expr):
+    def transform_expr(self, expr, _depth=0):
         """
         Transform expression to use SSA variables.
         
+        Recurses while the expression is shallow, which covers real
+        programs; subtrees nested deeper than _MAX_RECURSIVE_DEPTH are
+        handed to _transform_deep so they cannot hit the recursion limit.
+        
         Args:
             expr: Expression tuple
             
         Returns:
             Transformed expression
         """
-        if isinstance(expr, tuple):
-            if expr[0] == 'var':
-                return ('var', self.current(expr[1]))
-            elif expr[0] == 'cond':
-                op = expr[1].value if hasattr(expr[1], 'value') else expr[1]
-                left = self.transform_expr(expr[2])
-                right = self.transform_expr(expr[3])
-                return ('cond', op, left, right)
-            elif expr[0] in ('add', 'sub', 'mul', 'div'):
-                left = self.transform_expr(expr[1])
-                right = self.transform_expr(expr[2])
-                return (expr[0], left, right)
-        return expr
+        if type(expr) is not tuple:
+            return expr
+        tag = expr[0]
+        if tag == OP_VAR:
+            version = self.env.get(expr[1])
+            # Variables never assigned keep their original node
+            return expr if version is None else (OP_VAR, version)
+        compound = _COMPOUND[tag]
+        if compound is None:
+            return expr
+        if _depth >= _MAX_RECURSIVE_DEPTH:
+            return self._transform_deep(expr)
+        _depth += 1
+        return compound[2](expr,
+                           self.transform_expr(expr[compound[0]], _depth),
+                           self.transform_expr(expr[compound[1]], _depth))
+    
+    def _transform_deep(self, expr):
+        """
+        Transform expression to use SSA variables without recursion.
+        
+        Walks the expression iteratively in post-order, so deeply nested
+        expressions do not consume Python stack frames. Only compound
+        children are pushed; literals and variables are resolved inline
+        when their parent is combined.
+        
+        Args:
+            expr: Compound expression tuple (arithmetic or condition)
+            
+        Returns:
+            Transformed expression
+        """
+        env = self.env
+        work = [expr]
+        out = []
+        while work:
+            node = work.pop()
+            if node is _POST:
+                # Both compound children are on out; pop the right one first
+                node = work.pop()
+                left_idx, right_idx, rebuild = _COMPOUND[node[0]]
+                pending = True
+            else:
+                left_idx, right_idx, rebuild = _COMPOUND[node[0]]
+                pending = False
+            left = node[left_idx]
+            right = node[right_idx]
+            left_deep = type(left) is tuple and _COMPOUND[left[0]] is not None
+            right_deep = type(right) is tuple and _COMPOUND[right[0]] is not None
+            if pending:
+                if right_deep:
+                    right = out.pop()
+                if left_deep:
+                    left = out.pop()
+            elif left_deep or right_deep:
+                # Revisit this node once its compound children are done
+                work.append(node)
+                work.append(_POST)
+                if right_deep:
+                    work.append(right)
+                if left_deep:
+                    work.append(left)
+                continue
+            if not left_deep and type(left) is tuple and left[0] == OP_VAR:
+                version = env.get(left[1])
+                if version is not None:
+                    left = (OP_VAR, version)
+            if not right_deep and type(right) is tuple and right[0] == OP_VAR:
+                version = env.get(right[1])
+                if version is not None:
+                    right = (OP_VAR, version)
+            out.append(rebuild(node, left, right))
+        return out[0]
+
+def _format_expr(buf, expr):
+    """
+    Append the readable form of an expression to buf.
+    
+    Pending work is kept on a stack of either expressions or ready-made
+    string fragments, so nested expressions are rendered without recursion.
+    
+    Args:
+        buf: List of string fragments to append to
+        expr: Expression tuple or literal
+    """
+    append = buf.append
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if type(node) is not tuple:
+            append(node if type(node) is str else str(node))
+            continue
+        tag = node[0]
+        if tag == OP_VAR:
+            append(node[1])
+        elif tag == OP_COND:
+            stack.extend((node[3], ' ', node[1], ' ', node[2]))
+        elif tag in BINOPS:
+            stack.extend((node[2], _OP_STRS[tag], node[1]))
+        else:
+            append(str(node))
+
+def _render_stmt(kind, lhs, rhs):
+    """
+    Render one SSA statement as readable code.
+    
+    Args:
+        kind: Statement kind opcode
+        lhs: Assigned variable, or None
+        rhs: Expression or condition
+        
+    Returns:
+        Formatted statement
+    """
+    if kind == OP_ASSIGN:
+        buf = [lhs, ' := ']
+        _format_expr(buf, rhs)
+    else:
+        prefix, suffix = _STMT_FORMS[kind]
+        buf = [prefix]
+        _format_expr(buf, rhs)
+        buf.append(suffix)
+    return "".join(buf)
 
 def format_ssa_output(ssa_list):
     """
     Format SSA statements into readable code.
     
     Args:
-        ssa_list: List of SSA statements
+        ssa_list: List of SSA statements, or an SSAConverter; its
+            statements are rendered on first use and cached on ssa_repr
         
     Returns:
         Formatted string representation
     """
-    def format_expr(expr):
-        if isinstance(expr, tuple):
-            if expr[0] == 'var':
-                return expr[1]
-            elif expr[0] == 'cond':
-                return f"{format_expr(expr[2])} {expr[1]} {format_expr(expr[3])}"
-            elif expr[0] in ('add', 'sub', 'mul', 'div'):
-                ops = {
-                    'add': '+', 'sub': '-',
-                    'mul': '*', 'div': '/'
-                }
-                return f"{format_expr(expr[1])} {ops[expr[0]]} {format_expr(expr[2])}"
-        return str(expr)
+    if isinstance(ssa_list, SSAConverter):
+        if ssa_list.ssa_repr is None:
+            ssa_list.ssa_repr = [_render_stmt(kind, lhs, rhs) for kind, lhs, rhs
+                                 in zip(ssa_list.kinds, ssa_list.lhs, ssa_list.rhs)]
+        return "\n".join(ssa_list.ssa_repr)
     
     output = []
     for stmt in ssa_list:
         if isinstance(stmt, tuple):
-            if stmt[0] == 'if':
-                output.append(f"if {format_expr(stmt[1])}")
-            elif stmt[0] == 'while':
-                output.append(f"while {format_expr(stmt[1])}")
-            elif stmt[0] == 'for':
-                output.append(f"for {format_expr(stmt[1])}")
-            elif stmt[0] == 'assert':
-                output.append(f"assert({format_expr(stmt[1])})")
+            kind = _TAG_KINDS.get(stmt[0])
+            if kind is not None:
+                output.append(_render_stmt(kind, None, stmt[1]))
             else:
                 var, op, rhs = stmt
-                output.append(f"{var} := {format_expr(rhs)}")
+                output.append(_render_stmt(OP_ASSIGN, var, rhs))
     return "\n".join(output)